@@ -1,97 +1,258 @@
 """Minimal WSGI application serving the deterministic video planning UI."""
 from __future__ import annotations
 
+import gzip
 import json
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, fields, is_dataclass
+from hashlib import blake2b
 from pathlib import Path
-from typing import Callable, Iterable
+from threading import Lock
+from typing import Any, BinaryIO, Callable, Dict, FrozenSet, Iterable, Iterator, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 from .pipeline import VideoPipeline
 
 ASSET_DIR = Path(__file__).resolve().parent / "static"
+STATIC_PREFIX = "/static/"
+RESPONSE_CACHE_SIZE = 1024
+RESPONSE_CACHE_BYTES = 8 * 1024 * 1024
+MAX_CACHED_RESPONSE_BYTES = 32 * 1024
+MAX_REQUEST_BODY = 64 * 1024
+WARMUP_PROMPT = "warmup prompt for cache priming"
+INLINE_ASSET_LIMIT = 64 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_CONTENT_TYPES = {
+    ".css": "text/css; charset=utf-8",
+    ".html": "text/html; charset=utf-8",
+    ".ico": "image/x-icon",
+    ".js": "application/javascript; charset=utf-8",
+    ".json": "application/json",
+    ".map": "application/json",
+    ".png": "image/png",
+    ".svg": "image/svg+xml",
+    ".woff2": "font/woff2",
+}
+# Formats that are already compressed gain nothing from another content-coding.
+_PRECOMPRESSED_SUFFIXES = frozenset({".png", ".woff2"})
+# Content-codings in order of preference when a client accepts several.
+_CODING_PREFERENCE = ("br", "gzip")
+
+_Handler = Callable[[dict, Callable], Iterable[bytes]]
+
+if orjson is not None:
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+else:
+
+    def _loads(data: bytes) -> Any:
+        return json.loads(data)
+
+    def _dumps(obj: Any) -> bytes:
+        return _encode_json(obj).encode("utf-8")
+
+    _FIELD_NAMES: Dict[type, Tuple[str, ...]] = {}
+
+    def _dataclass_fields(obj: Any) -> dict:
+        # The plan's shape is fixed, so each dataclass type's field names are
+        # resolved once rather than re-walking ``fields()`` per instance.
+        names = _FIELD_NAMES.get(type(obj))
+        if names is None:
+            if not is_dataclass(obj):
+                raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+            names = _FIELD_NAMES[type(obj)] = tuple(field.name for field in fields(obj))
+        return {name: getattr(obj, name) for name in names}
+
+    _encode_json = json.JSONEncoder(default=_dataclass_fields).encode
+
+
+@dataclass(frozen=True, slots=True)
+class _StaticAsset:
+    """Precomputed metadata for a file under ``ASSET_DIR``.
+
+    ``payload`` holds the file contents for assets small enough to keep in
+    memory and is ``None`` for assets streamed from disk on each request.
+    ``encodings`` maps content-codings such as ``"gzip"`` to a precompressed
+    payload and the ETag identifying that representation.
+    """
+
+    path: Path
+    content_type: str
+    etag: str
+    size: int
+    payload: Optional[bytes]
+    encodings: Dict[str, Tuple[bytes, str]]
+
+
+class _ResponseCache:
+    """Thread-safe LRU cache mapping request digests to serialised responses.
+
+    The cache is bounded both by entry count and by total payload bytes, and
+    payloads larger than ``max_entry_bytes`` are never stored, so oversized
+    responses cannot pin memory.
+    """
+
+    def __init__(self, maxsize: int, *, max_bytes: int, max_entry_bytes: int) -> None:
+        self._maxsize = maxsize
+        self._max_bytes = max_bytes
+        self._max_entry_bytes = max_entry_bytes
+        self._entries: OrderedDict[bytes, bytes] = OrderedDict()
+        self._nbytes = 0
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+            return payload
+
+    def put(self, key: bytes, payload: bytes) -> None:
+        if len(payload) > self._max_entry_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._nbytes -= len(previous)
+            self._entries[key] = payload
+            self._nbytes += len(payload)
+            while len(self._entries) > self._maxsize or self._nbytes > self._max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= len(evicted)
 
 
 class WebApplication:
     """Simple WSGI application exposing the storyboard pipeline."""
 
-    def __init__(self, pipeline: VideoPipeline | None = None) -> None:
-        self._pipeline = pipeline or VideoPipeline()
+    def __init__(
+        self, pipeline: VideoPipeline | None = None, *, asset_dir: Path | None = None
+    ) -> None:
+        self._pipeline = pipeline or _DEFAULT_PIPELINE
+        self._responses = _ResponseCache(
+            RESPONSE_CACHE_SIZE,
+            max_bytes=RESPONSE_CACHE_BYTES,
+            max_entry_bytes=MAX_CACHED_RESPONSE_BYTES,
+        )
+        # The bundled assets are indexed and compressed once at import; only a
+        # custom ``asset_dir`` pays for building its own table.
+        self._assets = _DEFAULT_ASSETS if asset_dir is None else _load_assets(asset_dir)
+        self._routes: Dict[Tuple[str, str], _Handler] = {
+            ("GET", "/"): self._serve_index,
+            ("POST", "/api/generate"): self._handle_generate,
+        }
+        self._prefix_routes: Tuple[Tuple[str, str, _Handler], ...] = (
+            ("GET", STATIC_PREFIX, self._serve_static),
+        )
 
     def __call__(self, environ: dict, start_response: Callable) -> Iterable[bytes]:
         method = environ.get("REQUEST_METHOD", "GET").upper()
         path = environ.get("PATH_INFO", "/")
-        if method == "GET" and path == "/":
-            return self._serve_asset("index.html", "text/html", start_response)
-        if method == "GET" and path.startswith("/static/"):
-            asset = path.replace("/static/", "")
-            return self._serve_asset(asset, _content_type_for(asset), start_response)
-        if method == "POST" and path == "/api/generate":
-            return self._handle_generate(environ, start_response)
-
-        start_response("404 NOT FOUND", [("Content-Type", "text/plain; charset=utf-8")])
-        return [b"Not Found"]
-
-    def _serve_asset(self, name: str, content_type: str, start_response: Callable) -> Iterable[bytes]:
-        asset_path = ASSET_DIR / name
-        if not asset_path.is_file():
+        handler = self._routes.get((method, path))
+        if handler is None:
+            for route_method, prefix, prefix_handler in self._prefix_routes:
+                if method == route_method and path.startswith(prefix):
+                    handler = prefix_handler
+                    break
+            else:
+                start_response("404 NOT FOUND", [("Content-Type", "text/plain; charset=utf-8")])
+                return [b"Not Found"]
+        return handler(environ, start_response)
+
+    def _serve_index(self, environ: dict, start_response: Callable) -> Iterable[bytes]:
+        return self._serve_asset("index.html", environ, start_response)
+
+    def _serve_static(self, environ: dict, start_response: Callable) -> Iterable[bytes]:
+        asset = environ.get("PATH_INFO", "/")[len(STATIC_PREFIX) :]
+        return self._serve_asset(asset, environ, start_response, static=True)
+
+    def _serve_asset(
+        self, name: str, environ: dict, start_response: Callable, *, static: bool = False
+    ) -> Iterable[bytes]:
+        # Only names indexed from ASSET_DIR are served, so traversal attempts
+        # such as ``../app.py`` fall through to a 404 without touching disk.
+        asset = self._assets.get(name)
+        if asset is None:
             start_response("404 NOT FOUND", [("Content-Type", "text/plain; charset=utf-8")])
             return [b"Asset not found"]
-        payload = asset_path.read_bytes()
-        start_response("200 OK", [("Content-Type", content_type), ("Content-Length", str(len(payload)))])
-        return [payload]
+
+        payload, etag, coding = asset.payload, asset.etag, None
+        if asset.encodings:
+            accepted = _accepted_codings(environ.get("HTTP_ACCEPT_ENCODING", ""))
+            for candidate in _CODING_PREFERENCE:
+                if candidate in accepted and candidate in asset.encodings:
+                    payload, etag = asset.encodings[candidate]
+                    coding = candidate
+                    break
+
+        headers = [("ETag", etag), ("Vary", "Accept-Encoding")]
+        if static:
+            # Asset URLs are not fingerprinted, so clients must revalidate; the
+            # ETag turns that revalidation into a header-only 304.
+            headers.append(("Cache-Control", "public, no-cache"))
+        if _etag_matches(environ.get("HTTP_IF_NONE_MATCH", ""), etag):
+            start_response("304 Not Modified", headers)
+            return []
+
+        if coding is not None:
+            headers.append(("Content-Encoding", coding))
+        size = len(payload) if payload is not None else asset.size
+        headers += [("Content-Type", asset.content_type), ("Content-Length", str(size))]
+        start_response("200 OK", headers)
+        if payload is not None:
+            return [payload]
+        handle = asset.path.open("rb")
+        file_wrapper = environ.get("wsgi.file_wrapper")
+        if file_wrapper is not None:
+            # Lets the server hand the file descriptor to sendfile(2).
+            return file_wrapper(handle, STREAM_CHUNK_SIZE)
+        return _iter_file(handle)
 
     def _handle_generate(self, environ: dict, start_response: Callable) -> Iterable[bytes]:
         try:
             length = int(environ.get("CONTENT_LENGTH", "0"))
         except ValueError:
             length = 0
-        body = environ.get("wsgi.input").read(length) if length > 0 else b"{}"
+        if length > MAX_REQUEST_BODY:
+            start_response("413 PAYLOAD TOO LARGE", [("Content-Type", "application/json")])
+            return [_dumps({"error": f"Request body exceeds {MAX_REQUEST_BODY} bytes."})]
+        body = _read_body(environ["wsgi.input"], length) if length > 0 else b"{}"
+        cache_key = blake2b(body, digest_size=16).digest()
+        cached = self._responses.get(cache_key)
+        if cached is not None:
+            return self._send_json(cached, start_response)
+
         try:
-            payload = json.loads(body.decode("utf-8"))
-        except json.JSONDecodeError as exc:  # pragma: no cover - defensive path
+            payload = _loads(body)
+        except ValueError as exc:  # pragma: no cover - defensive path
             start_response("400 BAD REQUEST", [("Content-Type", "application/json")])
-            return [json.dumps({"error": f"Invalid JSON: {exc}"}).encode("utf-8")]
+            return [_dumps({"error": f"Invalid JSON: {exc}"})]
 
         prompt = str(payload.get("prompt", ""))
         try:
             plan = self._pipeline.create_plan(prompt)
         except ValueError as exc:
             start_response("400 BAD REQUEST", [("Content-Type", "application/json")])
-            return [json.dumps({"error": str(exc)}).encode("utf-8")]
-
-        response = {
-            "storyboard": [
-                {
-                    "index": segment.index,
-                    "duration_seconds": segment.duration_seconds,
-                    "title": segment.title,
-                    "description": segment.description,
-                }
-                for segment in plan.storyboard
-            ],
-            "render_segments": [
-                {
-                    "index": segment.index,
-                    "duration_seconds": segment.duration_seconds,
-                    "palette": segment.palette,
-                    "caption": segment.caption,
-                }
-                for segment in plan.render_segments
-            ],
-            "merged_video": {
-                "duration_seconds": plan.merged_video.duration_seconds,
-                "segment_order": list(plan.merged_video.segment_order),
-                "transitions": [
-                    {
-                        "from_index": transition.from_index,
-                        "to_index": transition.to_index,
-                        "style": transition.style,
-                        "duration_seconds": transition.duration_seconds,
-                    }
-                    for transition in plan.merged_video.transitions
-                ],
-            },
-        }
-        payload_bytes = json.dumps(response).encode("utf-8")
+            return [_dumps({"error": str(exc)})]
+
+        payload_bytes = _dumps(plan)
+        self._responses.put(cache_key, payload_bytes)
+        return self._send_json(payload_bytes, start_response)
+
+    def _send_json(self, payload_bytes: bytes, start_response: Callable) -> Iterable[bytes]:
         start_response(
             "200 OK",
             [
@@ -102,12 +263,131 @@ class WebApplication:
         return [payload_bytes]
 
 
+def _read_body(stream: BinaryIO, length: int) -> bytes:
+    """Read up to ``length`` bytes from ``stream`` into a single buffer."""
+
+    buffer = bytearray(length)
+    view = memoryview(buffer)
+    readinto = getattr(stream, "readinto", None)
+    filled = 0
+    while filled < length:
+        if readinto is not None:
+            count = readinto(view[filled:])
+        else:
+            chunk = stream.read(length - filled)
+            count = len(chunk)
+            view[filled : filled + count] = chunk
+        if not count:
+            break
+        filled += count
+    del view
+    if filled < length:
+        del buffer[filled:]
+    return bytes(buffer)
+
+
+def _iter_file(handle: BinaryIO) -> Iterator[bytes]:
+    try:
+        while chunk := handle.read(STREAM_CHUNK_SIZE):
+            yield chunk
+    finally:
+        handle.close()
+
+
+def _load_assets(directory: Path) -> Dict[str, _StaticAsset]:
+    """Index the asset directory, keeping small files resident in memory."""
+
+    assets: Dict[str, _StaticAsset] = {}
+    for path in directory.iterdir():
+        if not path.is_file():
+            continue
+        size = path.stat().st_size
+        if size <= INLINE_ASSET_LIMIT:
+            payload: Optional[bytes] = path.read_bytes()
+            digest = blake2b(payload, digest_size=8)
+        else:
+            payload = None
+            digest = blake2b(digest_size=8)
+            with path.open("rb") as handle:
+                for chunk in iter(lambda: handle.read(STREAM_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+        etag = f'"{digest.hexdigest()}"'
+        compressible = payload is not None and path.suffix.lower() not in _PRECOMPRESSED_SUFFIXES
+        assets[path.name] = _StaticAsset(
+            path=path,
+            content_type=_content_type_for(path.name),
+            etag=etag,
+            size=size,
+            payload=payload,
+            encodings=_precompress(payload, etag) if compressible else {},
+        )
+    return assets
+
+
+def _precompress(payload: bytes, etag: str) -> Dict[str, Tuple[bytes, str]]:
+    """Compress ``payload`` once for every supported content-coding.
+
+    Variants that do not shrink the payload are skipped. ``mtime=0`` keeps
+    the gzip output, and therefore its ETag, stable across restarts.
+    """
+
+    candidates = {"gzip": gzip.compress(payload, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        candidates["br"] = brotli.compress(payload, quality=11)
+    return {
+        coding: (compressed, f'{etag[:-1]}-{coding}"')
+        for coding, compressed in candidates.items()
+        if len(compressed) < len(payload)
+    }
+
+
+def _accepted_codings(accept_encoding: str) -> FrozenSet[str]:
+    """Return the content-codings an ``Accept-Encoding`` header allows.
+
+    Per RFC 9110 a ``*`` entry only covers codings not named elsewhere in
+    the header, so an explicit ``gzip;q=0`` still refuses gzip.
+    """
+
+    accepted = set()
+    refused = set()
+    wildcard = False
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        if _is_refused(params):
+            if coding != "*":
+                refused.add(coding)
+        elif coding == "*":
+            wildcard = True
+        else:
+            accepted.add(coding)
+    if wildcard:
+        accepted.update(coding for coding in _CODING_PREFERENCE if coding not in refused)
+    return frozenset(accepted)
+
+
+def _is_refused(params: str) -> bool:
+    for param in params.split(";"):
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value) == 0
+            except ValueError:
+                return True
+    return False
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
 def _content_type_for(asset_name: str) -> str:
-    if asset_name.endswith(".js"):
-        return "application/javascript"
-    if asset_name.endswith(".css"):
-        return "text/css"
-    return "text/plain; charset=utf-8"
+    return _CONTENT_TYPES.get(os.path.splitext(asset_name)[1].lower(), "application/octet-stream")
 
 
 def create_app() -> WebApplication:
@@ -116,4 +396,21 @@ def create_app() -> WebApplication:
     return WebApplication()
 
 
+def _warm_up(pipeline: VideoPipeline) -> None:
+    """Exercise the plan and serialisation paths once before the first request."""
+
+    _dumps(pipeline.create_plan(WARMUP_PROMPT))
+
+
+# Static assets are immutable for the life of the process, so their table
+# (contents, ETags and compressed variants) is built once and shared.
+_DEFAULT_ASSETS = _load_assets(ASSET_DIR)
+
+# The pipeline holds no per-request state, so every application shares one
+# instance (and its plan cache). Set ``AAL_SKIP_WARMUP`` to skip priming it.
+_DEFAULT_PIPELINE = VideoPipeline()
+if not os.environ.get("AAL_SKIP_WARMUP"):
+    _warm_up(_DEFAULT_PIPELINE)
+
+
 __all__ = ["WebApplication", "create_app"]
@@ -2,15 +2,64 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from hashlib import sha256
-from typing import Dict, Iterable, List, Sequence, Tuple
+from functools import lru_cache
+from hashlib import shake_128
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
 
 SEGMENT_DURATION_SECONDS = 6
 TOTAL_VIDEO_SECONDS = 120
 SEGMENTS_PER_VIDEO = TOTAL_VIDEO_SECONDS // SEGMENT_DURATION_SECONDS
+PLAN_CACHE_SIZE = 256
+# Plan size grows with word length, so only short prompts are memoised; this
+# caps the plan cache at a few megabytes even for single-word prompts.
+PLAN_CACHE_PROMPT_LIMIT = 256
+PALETTE_BYTES = 4
+WINDOW_SIZE = 4
 
+_SCENE_PREFIXES = tuple(f"Scene {index + 1}: Emphasise " for index in range(SEGMENTS_PER_VIDEO))
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
+class PromptContext:
+    """Tokenised prompt shared by the storyboard and render stages.
+
+    Attributes:
+        words: Whitespace-separated tokens of the prompt.
+        themes: Unique lower-case alphabetic words, in order of appearance,
+            used as storyboard themes. Capped at ``SEGMENTS_PER_VIDEO``
+            entries since later themes are never selected.
+        seed: UTF-8 encoding of the original prompt used to derive palettes.
+    """
+
+    words: Tuple[str, ...]
+    themes: Tuple[str, ...]
+    seed: bytes
+
+    @property
+    def sanitized(self) -> str:
+        """Prompt with whitespace runs collapsed to single spaces."""
+
+        return " ".join(self.words)
+
+    @classmethod
+    def from_prompt(cls, prompt: str) -> "PromptContext":
+        """Tokenise ``prompt`` once for every pipeline stage.
+
+        Raises:
+            ValueError: If ``prompt`` is empty or whitespace.
+        """
+
+        words = tuple(prompt.split())
+        if not words:
+            raise ValueError("Prompt must contain non-whitespace characters.")
+        return cls(
+            words=words,
+            themes=_derive_themes(words),
+            seed=prompt.encode("utf-8"),
+        )
+
+
+@dataclass(frozen=True, slots=True)
 class StorySegment:
     """Represents a storyboard segment.
 
@@ -27,7 +76,7 @@ class StorySegment:
     description: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class RenderSegment:
     """Rendering instructions for a storyboard segment.
 
@@ -44,7 +93,7 @@ class RenderSegment:
     caption: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Transition:
     """Describes a transition between two consecutive segments."""
 
@@ -54,7 +103,7 @@ class Transition:
     duration_seconds: float
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MergedVideo:
     """Represents the final merged video timeline."""
 
@@ -63,7 +112,7 @@ class MergedVideo:
     transitions: Sequence[Transition]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class VideoPlan:
     """Complete video plan consisting of storyboard, render, and merge data."""
 
@@ -84,11 +133,12 @@ class StoryboardGenerator:
     def __init__(self, *, segment_duration: int = SEGMENT_DURATION_SECONDS) -> None:
         self._segment_duration = segment_duration
 
-    def generate(self, prompt: str) -> List[StorySegment]:
+    def generate(self, prompt: Union[str, PromptContext]) -> List[StorySegment]:
         """Generate a storyboard from a prompt.
 
         Args:
-            prompt: User-provided description of the desired narrative.
+            prompt: User-provided description of the desired narrative, or a
+                ``PromptContext`` already built from it.
 
         Returns:
             Deterministic list of ``StorySegment`` objects covering the full
@@ -98,48 +148,42 @@ class StoryboardGenerator:
             ValueError: If ``prompt`` is empty or whitespace.
         """
 
-        if not prompt or prompt.strip() == "":
-            raise ValueError("Prompt must contain non-whitespace characters.")
-
-        sanitized_prompt = " ".join(prompt.strip().split())
-        words = sanitized_prompt.split(" ")
-        if not words:
-            raise ValueError("Prompt tokenisation failed; provide text content.")
-
-        primary_themes = self._derive_themes(words)
+        context = prompt if isinstance(prompt, PromptContext) else PromptContext.from_prompt(prompt)
+        words = context.words
+        primary_themes = context.themes
+        titles = [f"{theme.title()} focus" for theme in primary_themes]
+        elements = self._rolling_windows(words)
+        theme_count = len(primary_themes)
         segments: List[StorySegment] = []
         for index in range(SEGMENTS_PER_VIDEO):
-            theme = primary_themes[index % len(primary_themes)]
-            segment_words = self._rolling_window(words, index)
-            title = f"{theme.title()} focus"
-            description = (
-                f"Scene {index + 1}: Emphasise {theme} with elements {', '.join(segment_words)}."
-            )
+            slot = index % theme_count
             segments.append(
                 StorySegment(
                     index=index,
                     duration_seconds=self._segment_duration,
-                    title=title,
-                    description=description,
+                    title=titles[slot],
+                    description=(
+                        _SCENE_PREFIXES[index]
+                        + primary_themes[slot]
+                        + " with elements "
+                        + elements[index]
+                        + "."
+                    ),
                 )
             )
         return segments
 
-    def _derive_themes(self, words: Sequence[str]) -> List[str]:
-        unique_words: List[str] = []
-        seen = set()
-        for word in words:
-            normalised = word.lower()
-            if normalised not in seen and normalised.isalpha():
-                seen.add(normalised)
-                unique_words.append(normalised)
-        if not unique_words:
-            unique_words = ["concept"]
-        return unique_words
+    def _rolling_windows(self, words: Sequence[str]) -> List[str]:
+        """Return the comma-joined word window for every segment index."""
 
-    def _rolling_window(self, words: Sequence[str], offset: int) -> List[str]:
-        window_size = 4
-        return [words[(offset + i) % len(words)] for i in range(window_size)]
+        count = len(words)
+        # Repeat the words enough times that any window starting inside the
+        # first copy can be sliced without wrapping.
+        ring = list(words) * (1 + -(-(WINDOW_SIZE - 1) // count))
+        return [
+            ", ".join(ring[start : start + WINDOW_SIZE])
+            for start in (index % count for index in range(SEGMENTS_PER_VIDEO))
+        ]
 
 
 class ImaginerRenderer:
@@ -153,21 +197,39 @@ class ImaginerRenderer:
     def __init__(self, *, segment_duration: int = SEGMENT_DURATION_SECONDS) -> None:
         self._segment_duration = segment_duration
 
-    def render(self, prompt: str, storyboard: Iterable[StorySegment]) -> List[RenderSegment]:
+    def render(
+        self, prompt: Union[str, PromptContext], storyboard: Iterable[StorySegment]
+    ) -> List[RenderSegment]:
         """Create render segments for a storyboard.
 
         Args:
-            prompt: Original prompt used for hashing.
+            prompt: Original prompt used for hashing, or its ``PromptContext``.
             storyboard: Iterable of storyboard segments.
 
         Returns:
             List of ``RenderSegment`` objects matching the storyboard order.
+
+        Raises:
+            ValueError: If any storyboard segment has a negative index.
         """
 
-        seed_material = sha256(prompt.encode("utf-8")).hexdigest()
+        segments = tuple(storyboard)
+        if not segments:
+            return []
+        lowest_index = min(segment.index for segment in segments)
+        if lowest_index < 0:
+            raise ValueError(
+                f"Storyboard segment indices must be non-negative; got {lowest_index}."
+            )
+        # SHAKE-128 is an extendable-output function, so one digest covering the
+        # standard timeline yields every regular segment's palette bytes; the
+        # stream length is fixed so arbitrary indices cannot inflate it. The
+        # palette is cosmetic, hence ``usedforsecurity=False``.
+        seed = prompt.seed if isinstance(prompt, PromptContext) else prompt.encode("utf-8")
+        stream = shake_128(seed, usedforsecurity=False).digest(PALETTE_BYTES * SEGMENTS_PER_VIDEO)
         render_segments: List[RenderSegment] = []
-        for segment in storyboard:
-            palette = self._colour_palette(seed_material, segment.index)
+        for segment in segments:
+            palette = self._colour_palette(stream, seed, segment.index)
             caption = f"{segment.title}: {segment.description}"
             render_segments.append(
                 RenderSegment(
@@ -179,14 +241,19 @@ class ImaginerRenderer:
             )
         return render_segments
 
-    def _colour_palette(self, seed_material: str, index: int) -> Dict[str, int]:
-        material = f"{seed_material}:{index}".encode("utf-8")
-        digest = sha256(material).hexdigest()
-        red = int(digest[0:2], 16)
-        green = int(digest[2:4], 16)
-        blue = int(digest[4:6], 16)
-        accent = int(digest[6:8], 16)
-        return {"red": red, "green": green, "blue": blue, "accent": accent}
+    def _colour_palette(self, stream: bytes, seed: bytes, index: int) -> Dict[str, int]:
+        offset = index * PALETTE_BYTES
+        if index >= SEGMENTS_PER_VIDEO:
+            # Indices past the standard timeline hash their own 4 bytes.
+            material = seed + b":" + str(index).encode("ascii")
+            stream = shake_128(material, usedforsecurity=False).digest(PALETTE_BYTES)
+            offset = 0
+        return {
+            "red": stream[offset],
+            "green": stream[offset + 1],
+            "blue": stream[offset + 2],
+            "accent": stream[offset + 3],
+        }
 
 
 class VideoPipeline:
@@ -196,12 +263,26 @@ class VideoPipeline:
         self._storyboard = StoryboardGenerator()
         self._renderer = ImaginerRenderer()
         self._assembler = VideoAssembler()
+        self._cached_plan = lru_cache(maxsize=PLAN_CACHE_SIZE)(self._build_plan)
 
     def create_plan(self, prompt: str) -> VideoPlan:
-        """Create a video plan for the provided prompt."""
+        """Create a video plan for the provided prompt.
+
+        Plans are a pure function of ``prompt``. Prompts of up to
+        ``PLAN_CACHE_PROMPT_LIMIT`` characters are memoised per pipeline, so
+        repeated prompts return the same (shared) ``VideoPlan`` instance.
+        Callers must treat the returned plan, including its palette dicts, as
+        read-only.
+        """
+
+        if len(prompt) > PLAN_CACHE_PROMPT_LIMIT:
+            return self._build_plan(prompt)
+        return self._cached_plan(prompt)
 
-        storyboard = self._storyboard.generate(prompt)
-        render_segments = self._renderer.render(prompt, storyboard)
+    def _build_plan(self, prompt: str) -> VideoPlan:
+        context = PromptContext.from_prompt(prompt)
+        storyboard = tuple(self._storyboard.generate(context))
+        render_segments = tuple(self._renderer.render(context, storyboard))
         merged_video = self._assembler.assemble(render_segments)
         return VideoPlan(
             storyboard=storyboard,
@@ -241,34 +322,53 @@ class VideoAssembler:
         if not ordered_segments:
             raise ValueError("At least one segment is required to assemble a video.")
 
-        indices = [segment.index for segment in ordered_segments]
-        expected_indices = list(range(len(ordered_segments)))
-        if indices != expected_indices:
-            raise ValueError(
-                "Render segments must be ordered sequentially starting from index 0."
-            )
-
         transitions: List[Transition] = []
-        for current, nxt in zip(ordered_segments, ordered_segments[1:]):
-            transitions.append(
-                Transition(
-                    from_index=current.index,
-                    to_index=nxt.index,
-                    style=self._transition_style,
-                    duration_seconds=self._transition_duration,
+        for position, segment in enumerate(ordered_segments):
+            if segment.index != position:
+                raise ValueError(
+                    "Render segments must be ordered sequentially starting from index 0."
+                )
+            if position:
+                transitions.append(
+                    Transition(
+                        from_index=position - 1,
+                        to_index=position,
+                        style=self._transition_style,
+                        duration_seconds=self._transition_duration,
+                    )
                 )
-            )
 
         return MergedVideo(
             duration_seconds=self._total_duration,
-            segment_order=tuple(indices),
+            segment_order=tuple(range(len(ordered_segments))),
             transitions=tuple(transitions),
         )
 
 
+def _derive_themes(words: Sequence[str]) -> Tuple[str, ...]:
+    unique_words: List[str] = []
+    seen = set()
+    for word in words:
+        normalised = word.lower()
+        if normalised not in seen and normalised.isalpha():
+            seen.add(normalised)
+            unique_words.append(normalised)
+            # Segments pick ``themes[index % len(themes)]``, so themes past
+            # the first SEGMENTS_PER_VIDEO are never selected.
+            if len(unique_words) == SEGMENTS_PER_VIDEO:
+                break
+    if not unique_words:
+        unique_words = ["concept"]
+    return tuple(unique_words)
+
+
 __all__ = [
     "ImaginerRenderer",
     "MergedVideo",
+    "PALETTE_BYTES",
+    "PLAN_CACHE_PROMPT_LIMIT",
+    "PLAN_CACHE_SIZE",
+    "PromptContext",
     "RenderSegment",
     "SEGMENT_DURATION_SECONDS",
     "SEGMENTS_PER_VIDEO",
@@ -1,17 +1,41 @@
 """Command-line entry point for serving the web application."""
 from __future__ import annotations
 
-from wsgiref.simple_server import make_server
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIServer, make_server
 
 from .app import create_app
 
+try:
+    from waitress import serve
+except ImportError:  # pragma: no cover - optional dependency
+    serve = None
+
+HOST = "0.0.0.0"
+PORT = 8000
+WAITRESS_THREADS = 8
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """``wsgiref`` server handling each request on its own thread."""
+
+    daemon_threads = True
+
 
 def main() -> None:
-    """Run a development WSGI server on localhost:8000."""
+    """Run a development WSGI server on localhost:8000.
+
+    Uses ``waitress`` when it is installed and otherwise falls back to a
+    threaded ``wsgiref`` server, so concurrent requests do not queue behind
+    each other.
+    """
 
     app = create_app()
-    with make_server("0.0.0.0", 8000, app) as httpd:
-        print("Serving on http://localhost:8000")  # noqa: T201 - developer convenience
+    print(f"Serving on http://localhost:{PORT}")  # noqa: T201 - developer convenience
+    if serve is not None:
+        serve(app, host=HOST, port=PORT, threads=WAITRESS_THREADS)
+        return
+    with make_server(HOST, PORT, app, server_class=ThreadingWSGIServer) as httpd:
         httpd.serve_forever()
 
 
@@ -0,0 +1,311 @@
+"""Tests for the WSGI application wrapping the video planning pipeline."""
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import zlib
+from dataclasses import asdict
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+
+import pytest
+
+from aal.webapp import app as app_module
+from aal.webapp.app import WebApplication
+from aal.webapp.pipeline import SEGMENTS_PER_VIDEO, VideoPipeline
+
+
+def _call(
+    application: WebApplication,
+    method: str,
+    path: str,
+    body: bytes = b"",
+    headers: Dict[str, str] | None = None,
+) -> Tuple[str, Dict[str, str], bytes]:
+    environ = {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+    }
+    environ.update(headers or {})
+    captured: List[Tuple[str, List[Tuple[str, str]]]] = []
+
+    def start_response(status: str, response_headers: List[Tuple[str, str]]) -> None:
+        captured.append((status, response_headers))
+
+    chunks = application(environ, start_response)
+    status, response_headers = captured[0]
+    return status, dict(response_headers), b"".join(chunks)
+
+
+@pytest.fixture()
+def application() -> WebApplication:
+    return WebApplication()
+
+
+def test_generate_returns_documented_payload(application: WebApplication) -> None:
+    """The generate endpoint serialises the full plan described in the design doc."""
+
+    body = json.dumps({"prompt": "Lanterns drifting over a quiet harbour"}).encode("utf-8")
+    status, headers, payload = _call(application, "POST", "/api/generate", body)
+    assert status == "200 OK"
+    assert headers["Content-Length"] == str(len(payload))
+    plan = json.loads(payload)
+    assert len(plan["storyboard"]) == SEGMENTS_PER_VIDEO
+    assert set(plan["render_segments"][0]["palette"]) == {"red", "green", "blue", "accent"}
+    assert plan["merged_video"]["segment_order"] == list(range(SEGMENTS_PER_VIDEO))
+    assert len(plan["merged_video"]["transitions"]) == SEGMENTS_PER_VIDEO - 1
+
+
+def test_generate_payload_mirrors_plan_dataclasses(application: WebApplication) -> None:
+    """The response is the plan's dataclass tree serialised field-for-field."""
+
+    prompt = "Comets stitching light across a desert sky"
+    body = json.dumps({"prompt": prompt}).encode("utf-8")
+    _, _, payload = _call(application, "POST", "/api/generate", body)
+    plan = application._pipeline.create_plan(prompt)
+    assert json.loads(payload) == json.loads(json.dumps(asdict(plan)))
+
+
+def test_applications_share_default_pipeline() -> None:
+    """Applications built without a pipeline reuse the module-level instance."""
+
+    assert WebApplication()._pipeline is WebApplication()._pipeline
+
+
+def test_applications_share_default_asset_table() -> None:
+    """The bundled asset table is built once at import, not per application."""
+
+    assert WebApplication()._assets is WebApplication()._assets
+
+
+def test_orjson_backend_is_used_when_installed() -> None:
+    """The fast JSON backend is selected whenever orjson is importable."""
+
+    orjson = pytest.importorskip("orjson")
+    assert app_module._dumps is orjson.dumps
+    assert app_module._loads is orjson.loads
+
+
+def test_generate_uses_module_json_shim(
+    application: WebApplication, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Serialisation goes through the patchable ``_dumps`` hook."""
+
+    monkeypatch.setattr(app_module, "_dumps", lambda obj: b"patched")
+    body = json.dumps({"prompt": "Quiet harbour"}).encode("utf-8")
+    status, _, payload = _call(application, "POST", "/api/generate", body)
+    assert status == "200 OK"
+    assert payload == b"patched"
+
+
+def test_empty_prompt_returns_bad_request(application: WebApplication) -> None:
+    """Validation errors from the pipeline surface as JSON 400 responses."""
+
+    body = json.dumps({"prompt": "   "}).encode("utf-8")
+    status, _, payload = _call(application, "POST", "/api/generate", body)
+    assert status == "400 BAD REQUEST"
+    assert "error" in json.loads(payload)
+
+
+def test_repeated_prompt_is_served_from_cache(
+    application: WebApplication, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Identical request bodies reuse the serialised response without replanning."""
+
+    body = json.dumps({"prompt": "Glaciers calving at dusk"}).encode("utf-8")
+    _, _, first = _call(application, "POST", "/api/generate", body)
+
+    def fail(prompt: str) -> None:
+        raise AssertionError("pipeline should not run for cached prompts")
+
+    monkeypatch.setattr(application._pipeline, "create_plan", fail)
+    _, _, second = _call(application, "POST", "/api/generate", body)
+    assert second == first
+
+
+def test_index_is_served_from_memory(application: WebApplication) -> None:
+    """Small assets are answered from the in-memory asset table."""
+
+    status, headers, payload = _call(application, "GET", "/")
+    assert status == "200 OK"
+    assert payload == (app_module.ASSET_DIR / "index.html").read_bytes()
+    assert headers["Content-Length"] == str(len(payload))
+
+
+def test_large_asset_uses_file_wrapper(tmp_path) -> None:
+    """Assets above the inline limit are streamed through ``wsgi.file_wrapper``."""
+
+    content = b"x" * (app_module.INLINE_ASSET_LIMIT + 1)
+    (tmp_path / "large.js").write_bytes(content)
+    application = WebApplication(asset_dir=tmp_path)
+    wrapped: List[int] = []
+
+    def file_wrapper(handle: io.BufferedReader, block_size: int):
+        wrapped.append(block_size)
+        with handle:
+            return [handle.read()]
+
+    status, headers, payload = _call(
+        application, "GET", "/static/large.js", headers={"wsgi.file_wrapper": file_wrapper}
+    )
+    assert status == "200 OK"
+    assert wrapped == [app_module.STREAM_CHUNK_SIZE]
+    assert headers["Content-Length"] == str(len(content))
+    assert payload == content
+
+
+def test_static_asset_revalidation_returns_not_modified(application: WebApplication) -> None:
+    """A matching ``If-None-Match`` yields an empty 304 response."""
+
+    status, headers, _ = _call(application, "GET", "/static/main.js")
+    assert status == "200 OK"
+    etag = headers["ETag"]
+
+    status, headers, payload = _call(
+        application, "GET", "/static/main.js", headers={"HTTP_IF_NONE_MATCH": etag}
+    )
+    assert status == "304 Not Modified"
+    assert headers["ETag"] == etag
+    assert payload == b""
+
+
+@pytest.mark.parametrize(
+    ("name", "expected"),
+    [
+        ("main.js", "application/javascript; charset=utf-8"),
+        ("styles.css", "text/css; charset=utf-8"),
+        ("logo.SVG", "image/svg+xml"),
+        ("font.woff2", "font/woff2"),
+        ("archive.bin", "application/octet-stream"),
+    ],
+)
+def test_content_type_for_known_suffixes(name: str, expected: str) -> None:
+    """Asset content types are resolved from the file suffix."""
+
+    assert app_module._content_type_for(name) == expected
+
+
+@pytest.mark.parametrize(
+    "path", ["/static/../app.py", "/static/../../README.md", "/static/missing.js", "/static/"]
+)
+def test_unknown_static_paths_are_not_found(application: WebApplication, path: str) -> None:
+    """Only files indexed from the asset directory are served."""
+
+    status, _, _ = _call(application, "GET", path)
+    assert status == "404 NOT FOUND"
+
+
+def test_oversized_request_body_is_rejected(application: WebApplication) -> None:
+    """Bodies declared larger than the cap are refused before being read."""
+
+    status, _, payload = _call(
+        application,
+        "POST",
+        "/api/generate",
+        headers={"CONTENT_LENGTH": str(app_module.MAX_REQUEST_BODY + 1)},
+    )
+    assert status == "413 PAYLOAD TOO LARGE"
+    assert "error" in json.loads(payload)
+
+
+@pytest.mark.parametrize(
+    ("method", "path"), [("GET", "/api/generate"), ("POST", "/"), ("POST", "/static/main.js")]
+)
+def test_unrouted_requests_are_not_found(
+    application: WebApplication, method: str, path: str
+) -> None:
+    """Routes only match their registered method."""
+
+    status, _, payload = _call(application, method, path)
+    assert status == "404 NOT FOUND"
+    assert payload == b"Not Found"
+
+
+def test_static_asset_honours_accept_encoding(application: WebApplication) -> None:
+    """Text assets are served gzip-compressed to clients that accept it."""
+
+    original = (app_module.ASSET_DIR / "main.js").read_bytes()
+    status, headers, payload = _call(
+        application, "GET", "/static/main.js", headers={"HTTP_ACCEPT_ENCODING": "gzip, deflate"}
+    )
+    assert status == "200 OK"
+    assert headers["Content-Encoding"] == "gzip"
+    assert headers["Vary"] == "Accept-Encoding"
+    assert headers["Content-Length"] == str(len(payload))
+    assert gzip.decompress(payload) == original
+
+    status, headers, payload = _call(
+        application, "GET", "/static/main.js", headers={"HTTP_ACCEPT_ENCODING": "gzip;q=0"}
+    )
+    assert "Content-Encoding" not in headers
+    assert payload == original
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        ("*", {"br", "gzip"}),
+        ("gzip;q=0, *", {"br"}),
+        ("*, br;q=0", {"gzip"}),
+        ("gzip, *;q=0", {"gzip"}),
+        ("", set()),
+    ],
+)
+def test_accepted_codings_wildcard(header: str, expected: set) -> None:
+    """``*`` covers only codings the header does not name explicitly."""
+
+    assert app_module._accepted_codings(header) == expected
+
+
+def test_static_asset_prefers_brotli(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Brotli wins over gzip when the client accepts both and it is available."""
+
+    fake_brotli = SimpleNamespace(compress=lambda data, quality: b"br:" + zlib.compress(data))
+    monkeypatch.setattr(app_module, "brotli", fake_brotli)
+    application = WebApplication(asset_dir=app_module.ASSET_DIR)
+    original = (app_module.ASSET_DIR / "main.js").read_bytes()
+
+    _, headers, payload = _call(
+        application, "GET", "/static/main.js", headers={"HTTP_ACCEPT_ENCODING": "gzip, br"}
+    )
+    assert headers["Content-Encoding"] == "br"
+    assert headers["ETag"].endswith('-br"')
+    assert zlib.decompress(payload[3:]) == original
+
+    _, headers, payload = _call(
+        application, "GET", "/static/main.js", headers={"HTTP_ACCEPT_ENCODING": "br;q=0, *"}
+    )
+    assert headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(payload) == original
+
+
+def test_oversized_response_is_not_cached() -> None:
+    """A prompt near the body cap produces a response that is never retained."""
+
+    pipeline = VideoPipeline()
+    application = WebApplication(pipeline)
+    prompt = "a" * (app_module.MAX_REQUEST_BODY - 32)
+    body = json.dumps({"prompt": prompt}).encode("utf-8")
+    assert len(body) <= app_module.MAX_REQUEST_BODY
+    status, _, payload = _call(application, "POST", "/api/generate", body)
+    assert status == "200 OK"
+    assert len(payload) > app_module.MAX_CACHED_RESPONSE_BYTES
+    assert len(application._responses) == 0
+    assert pipeline._cached_plan.cache_info().currsize == 0
+
+
+def test_response_cache_is_bounded_by_bytes() -> None:
+    """Entries are evicted once the total payload budget is exceeded."""
+
+    cache = app_module._ResponseCache(10, max_bytes=10, max_entry_bytes=8)
+    cache.put(b"a", b"12345")
+    cache.put(b"b", b"12345")
+    cache.put(b"c", b"123")
+    assert cache.get(b"a") is None
+    assert cache.get(b"b") == b"12345"
+    cache.put(b"d", b"123456789")
+    assert cache.get(b"d") is None
+    assert len(cache) == 2
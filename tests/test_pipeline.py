@@ -6,7 +6,10 @@ import pytest
 from aal.webapp.pipeline import (
     SEGMENT_DURATION_SECONDS,
     SEGMENTS_PER_VIDEO,
+    ImaginerRenderer,
+    PromptContext,
     RenderSegment,
+    StorySegment,
     StoryboardGenerator,
     Transition,
     VideoAssembler,
@@ -85,3 +88,61 @@ def test_video_assembler_requires_sequential_indices() -> None:
 
     with pytest.raises(ValueError):
         assembler.assemble(segments)
+
+
+def test_create_plan_is_memoised(pipeline: VideoPipeline) -> None:
+    """Repeated prompts return the cached plan instance."""
+
+    prompt = "Clockwork gardens blooming at midnight"
+    assert pipeline.create_plan(prompt) is pipeline.create_plan(prompt)
+
+
+def test_prompt_context_matches_raw_prompt() -> None:
+    """Stages produce the same output from a shared context as from the prompt."""
+
+    prompt = "  Paper   boats racing down a rain gutter  "
+    context = PromptContext.from_prompt(prompt)
+    assert context.sanitized == "Paper boats racing down a rain gutter"
+    generator = StoryboardGenerator()
+    renderer = ImaginerRenderer()
+    storyboard = generator.generate(context)
+    assert storyboard == generator.generate(prompt)
+    assert renderer.render(context, storyboard) == renderer.render(prompt, storyboard)
+
+
+def test_render_palettes_are_plain_byte_dicts(pipeline: VideoPipeline) -> None:
+    """Each palette is a plain dict of four byte-valued colour channels."""
+
+    plan = pipeline.create_plan("Koi circling beneath lantern-lit bridges")
+    for segment in plan.render_segments:
+        assert type(segment.palette) is dict
+        assert set(segment.palette) == {"red", "green", "blue", "accent"}
+        assert all(0 <= value <= 255 for value in segment.palette.values())
+    fresh = VideoPipeline().create_plan("Koi circling beneath lantern-lit bridges")
+    assert [s.palette for s in fresh.render_segments] == [
+        s.palette for s in plan.render_segments
+    ]
+
+
+@pytest.mark.parametrize("index", [-1, -5])
+def test_renderer_rejects_negative_indices(index: int) -> None:
+    """Segments with negative indices cannot be mapped onto the palette stream."""
+
+    segment = StorySegment(
+        index=index, duration_seconds=SEGMENT_DURATION_SECONDS, title="t", description="d"
+    )
+    with pytest.raises(ValueError, match=str(index)):
+        ImaginerRenderer().render("Moonlit canals", [segment])
+
+
+@pytest.mark.parametrize("index", [SEGMENTS_PER_VIDEO, 10**8, 2**62])
+def test_renderer_handles_large_indices(index: int) -> None:
+    """Indices past the standard timeline get deterministic palettes cheaply."""
+
+    segment = StorySegment(
+        index=index, duration_seconds=SEGMENT_DURATION_SECONDS, title="t", description="d"
+    )
+    renderer = ImaginerRenderer()
+    first = renderer.render("Moonlit canals", [segment])
+    assert first == renderer.render("Moonlit canals", [segment])
+    assert all(0 <= value <= 255 for value in first[0].palette.values())